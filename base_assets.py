@@ -4,7 +4,8 @@ _MAJOR_VERSION = 0
 _MINOR_VERSION = 1
 _REL_CHANGES = [8]
 _CHANGELOG_ENTRIES = [
-    "Released as v0.1.0"
+    "Released as v0.1.0",
+    "PERFORMANCE: Added get_full_dict() so callers can compare metadata without a JSON round-trip."
 ]
 _PATCH_VERSION = len(_CHANGELOG_ENTRIES)
 # ------------------------------------------------------------------------------
@@ -40,6 +41,10 @@ class GenericFileAsset:
             size /= 1024.0
         return f"{size:.2f} PiB"
 
+    def get_full_dict(self) -> Dict[str, Any]:
+        """Returns the exhaustive metadata dictionary itself, for callers that never need the JSON."""
+        return self.extended_metadata
+
     def get_full_json(self) -> str:
         """Returns the exhaustive metadata dictionary as a JSON string."""
         return json.dumps(self.extended_metadata, indent=4)
@@ -7,7 +7,9 @@ _MINOR_VERSION = 1
 # CHANGELOG:
 _REL_CHANGES = [12]
 _CHANGELOG_ENTRIES = [
-    "Released as v0.1.0"
+    "Released as v0.1.0",
+    "FEATURE: Added DEDUPE_WORKERS for process-parallel path calculation.",
+    "REFACTOR: Removed DEDUPE_WORKERS; deduplication path calculation runs serially."
 ]
 # ------------------------------------------------------------------------------
 from pathlib import Path
@@ -7,18 +7,52 @@ _MINOR_VERSION = 1
 # CHANGELOG:
 _REL_CHANGES = [18]
 _CHANGELOG_ENTRIES = [
-    "Released as v0.1.0"
+    "Released as v0.1.0",
+    "PERFORMANCE: Added execute_batches() to stream large SELECTs with fetchmany instead of fetchall.",
+    "PERFORMANCE: Added idx_fpi_primary_order so deduplication's primary ordering is read from an index instead of sorted.",
+    "PERFORMANCE: Added transaction() context manager and enable_bulk_writes() (WAL + synchronous=NORMAL) for multi-statement bulk updates.",
+    "PERFORMANCE: Column migrations check PRAGMA table_info once instead of probing with ALTER TABLE and catching the failure.",
+    "PERFORMANCE: Connections keep up to STATEMENT_CACHE_SIZE compiled statements (stdlib default is 128).",
+    "PERFORMANCE: execute_query() classifies the statement once and runs it through Connection.execute, trimming per-call overhead.",
+    "PERFORMANCE: enable_bulk_writes() also keeps temp B-trees in memory and enlarges the page cache for window sorts and bulk updates.",
+    "PERFORMANCE: Added covering index idx_mc_hash_size; close() runs a bounded PRAGMA optimize so the planner keeps fresh statistics.",
+    "PERFORMANCE: Added covering index idx_mc_hash_date_best so the deduplication JOIN never reads full MediaContent rows.",
+    "PERFORMANCE: enable_bulk_writes() memory-maps up to BULK_MMAP_SIZE of the database and checkpoints the WAL every BULK_WAL_AUTOCHECKPOINT pages.",
+    "FIX: transaction() rolls back on any exception, not only sqlite3.Error, so an interrupted block never leaves a transaction open.",
+    "PERFORMANCE: idx_mc_hash_size and idx_mc_hash_date_best merged into one covering idx_mc_hash_size_date; redundant idx_fpi_content_hash dropped (idx_fpi_primary_order leads with content_hash)."
 ]
 _PATCH_VERSION = len(_CHANGELOG_ENTRIES)
 # ------------------------------------------------------------------------------
 import sqlite3
-from typing import Optional, Tuple, List, Any
+from typing import Optional, Tuple, List, Any, Iterator
 import os
 import sys
 import argparse
 from contextlib import contextmanager
 from pathlib import Path
 
+# Columns added after the first schema release: (table, column, type)
+COLUMN_MIGRATIONS: List[Tuple[str, str, str]] = [
+    ('MediaContent', 'new_path_id', 'TEXT'),
+    ('MediaContent', 'perceptual_hash', 'TEXT'), # New for v0.11
+]
+
+# Indices superseded by wider ones below; dropped from existing databases so writes stop maintaining them
+OBSOLETE_INDEXES: List[str] = [
+    'idx_fpi_content_hash',   # Leading column of idx_fpi_primary_order
+    'idx_mc_hash_size',       # Merged into idx_mc_hash_size_date
+    'idx_mc_hash_date_best',  # Merged into idx_mc_hash_size_date
+]
+
+# Compiled statements kept per connection, so repeated queries skip re-parsing
+STATEMENT_CACHE_SIZE = 256
+# Page cache for bulk work, in KiB (negative cache_size = KiB rather than pages)
+BULK_CACHE_SIZE_KIB = 200000
+# Bytes of the database file read through mmap instead of read() during bulk work
+BULK_MMAP_SIZE = 256 * 1024 * 1024
+# WAL pages written before an automatic checkpoint (SQLite default is 1000)
+BULK_WAL_AUTOCHECKPOINT = 10000
+
 class DatabaseManager:
     """
     Manages the SQLite connection and provides core database operations.
@@ -46,16 +80,60 @@ class DatabaseManager:
             if db_dir and not os.path.exists(db_dir):
                 os.makedirs(db_dir, exist_ok=True)
                 
-            self.conn = sqlite3.connect(self.db_path)
+            self.conn = sqlite3.connect(self.db_path, cached_statements=STATEMENT_CACHE_SIZE)
             # Enable foreign key constraint enforcement
             self.conn.execute('PRAGMA foreign_keys = ON;')
 
     def close(self):
         """Closes the database connection."""
         if self.conn:
+            try:
+                # Refresh planner statistics where they are stale; analysis_limit keeps it cheap on large tables
+                self.conn.execute('PRAGMA analysis_limit = 400;')
+                self.conn.execute('PRAGMA optimize;')
+            except sqlite3.Error:
+                pass
             self.conn.close()
             self.conn = None
 
+    def enable_bulk_writes(self):
+        """
+        Switches the connection to WAL journaling with synchronous=NORMAL.
+        Commits then only fsync at checkpoints instead of on every transaction.
+        Temp tables/sorters stay in RAM and the page cache grows to BULK_CACHE_SIZE_KIB.
+        Pages are read via mmap, and checkpoints run every BULK_WAL_AUTOCHECKPOINT pages
+        rather than every 1000, so large batches aren't interrupted by checkpoint I/O.
+        Only the calling thread writes; sqlite3's default 5s timeout covers waiting readers.
+        """
+        if not self.conn:
+            self.connect()
+        self.conn.execute('PRAGMA journal_mode = WAL;')
+        self.conn.execute('PRAGMA synchronous = NORMAL;')
+        self.conn.execute('PRAGMA temp_store = MEMORY;')
+        self.conn.execute(f'PRAGMA cache_size = -{BULK_CACHE_SIZE_KIB};')
+        self.conn.execute(f'PRAGMA mmap_size = {BULK_MMAP_SIZE};')
+        self.conn.execute(f'PRAGMA wal_autocheckpoint = {BULK_WAL_AUTOCHECKPOINT};')
+
+    @contextmanager
+    def transaction(self):
+        """
+        Yields a cursor whose statements are committed together on exit,
+        or rolled back together if anything in the block raises
+        (including non-sqlite errors from executemany generators and Ctrl+C).
+        """
+        if not self.conn:
+            self.connect()
+
+        cursor = self.conn.cursor()
+        try:
+            yield cursor
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
     def execute_query(self, query: str, params: Optional[Tuple] = None) -> List[Tuple] | int:
         """
         Executes a single query.
@@ -63,28 +141,47 @@ class DatabaseManager:
         if not self.conn:
             self.connect()
 
-        cursor = self.conn.cursor()
+        # Classify the statement once; only the first word matters, so skip upper-casing the whole query
+        is_select = query.lstrip()[:6].upper() == 'SELECT'
         
         try:
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
+            # Connection.execute creates the cursor internally
+            cursor = self.conn.execute(query, params) if params else self.conn.execute(query)
             
-            if query.strip().upper().startswith('SELECT'):
+            if is_select:
                 # Return results for SELECT
-                result = cursor.fetchall()
-                return result if result is not None else []
+                return cursor.fetchall()
             else:
                 # For INSERT/UPDATE/DELETE, commit
                 self.conn.commit()
                 return cursor.rowcount
                 
         except sqlite3.Error as e:
-            if self.conn and not query.strip().upper().startswith('SELECT'):
+            if self.conn and not is_select:
                 self.conn.rollback()
             raise e
 
+    def execute_batches(self, query: str, params: Optional[Tuple] = None, batch_size: int = 10000) -> Iterator[List[Tuple]]:
+        """
+        Executes a SELECT and yields its rows in lists of up to batch_size.
+        Keeps memory bounded for result sets too large to fetchall().
+        """
+        if not self.conn:
+            self.connect()
+
+        cursor = self.conn.cursor()
+        cursor.arraysize = batch_size
+        try:
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+
+            while batch := cursor.fetchmany():
+                yield batch
+        finally:
+            cursor.close()
+
     def execute_many(self, query: str, params_list: List[Tuple]) -> int:
         """
         Executes the same query for many sets of parameters.
@@ -154,29 +251,35 @@ class DatabaseManager:
         """
         
         # Indices for Performance
-        index_hash_sql = "CREATE INDEX IF NOT EXISTS idx_fpi_content_hash ON FilePathInstances(content_hash);"
         index_primary_sql = "CREATE INDEX IF NOT EXISTS idx_fpi_is_primary ON FilePathInstances(is_primary);"
         index_phash_sql = "CREATE INDEX IF NOT EXISTS idx_mc_phash ON MediaContent(perceptual_hash);"
+        # Matches the Deduplicator's primary ordering (file_id is the rowid, so it rides along for free);
+        # its content_hash prefix also serves plain hash lookups and the MediaContent cascade
+        index_primary_order_sql = "CREATE INDEX IF NOT EXISTS idx_fpi_primary_order ON FilePathInstances(content_hash, date_modified, LENGTH(path));"
+        # Covers hash -> size lookups and the Deduplicator's hash -> date_best join without touching
+        # the wide MediaContent rows (extended_metadata JSON)
+        index_hash_size_date_sql = "CREATE INDEX IF NOT EXISTS idx_mc_hash_size_date ON MediaContent(content_hash, size, date_best);"
         
         try:
             self.conn.execute(content_table_sql)
             self.conn.execute(instance_table_sql)
             
             # --- MIGRATIONS ---
-            # 1. new_path_id
-            try:
-                self.conn.execute("ALTER TABLE MediaContent ADD COLUMN new_path_id TEXT;")
-            except sqlite3.OperationalError: pass
-            
-            # 2. perceptual_hash (New for v0.11)
-            try:
-                self.conn.execute("ALTER TABLE MediaContent ADD COLUMN perceptual_hash TEXT;")
-            except sqlite3.OperationalError: pass
+            # Read each table's columns once rather than probing with ALTER TABLE and catching the error
+            known_columns = {}
+            for table, column, column_type in COLUMN_MIGRATIONS:
+                if table not in known_columns:
+                    known_columns[table] = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table});")}
+                if column not in known_columns[table]:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type};")
                 
             # Create Indices
-            self.conn.execute(index_hash_sql)
+            for index_name in OBSOLETE_INDEXES:
+                self.conn.execute(f"DROP INDEX IF EXISTS {index_name};")
             self.conn.execute(index_primary_sql)
             self.conn.execute(index_phash_sql)
+            self.conn.execute(index_primary_order_sql)
+            self.conn.execute(index_hash_size_date_sql)
                 
             self.conn.commit()
         except sqlite3.Error as e:
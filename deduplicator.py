@@ -4,24 +4,128 @@ _MAJOR_VERSION = 0
 _MINOR_VERSION = 1
 _REL_CHANGES = [14]
 _CHANGELOG_ENTRIES = [
-    "Released as v0.1.0"
+    "Released as v0.1.0",
+    "PERFORMANCE: Path calculation for renamed primaries is fanned out to a process pool in row batches on large libraries.",
+    "PERFORMANCE: Instances are streamed from SQLite in fetchmany batches instead of one fetchall().",
+    "REFACTOR: Removed unused _parse_date(); renamed paths now come from a single helper shared by the serial and pooled paths.",
+    "PERFORMANCE: Year/month are sliced straight out of 'YYYY-MM-DD' strings instead of going through strptime().",
+    "PERFORMANCE: Unique/duplicate counters are derived from totals after the loop instead of incremented per row.",
+    "PERFORMANCE: Primary selection moved into SQL (ROW_NUMBER window per content_hash); Python only sees one row per unique file.",
+    "PERFORMANCE: is_primary reset, primary flags and new_path_id updates are written in one WAL transaction.",
+    "PERFORMANCE: Duplicate accounting folded into the primary query via COUNT(*) OVER; the separate instance COUNT is gone.",
+    "PERFORMANCE: Date string -> (year, month) results are memoized; burst shots and bulk copies share identical timestamps.",
+    "PERFORMANCE: Extensions come from os.path.splitext and renamed paths are assembled as strings instead of via PurePath objects.",
+    "PERFORMANCE: OUTPUT_DIR is stringified once at init; original-name paths are assembled without Path objects too.",
+    "PERFORMANCE: Update tuples are generated lazily into executemany instead of being collected into lists first.",
+    "REFACTOR: Primary selection SQL lives in one module-level statement instead of being rebuilt inside run_deduplication().",
+    "PERFORMANCE: Duplicate total comes from one aggregate (COUNT(*) - COUNT(DISTINCT)) instead of summing per-hash counts in Python.",
+    "PERFORMANCE: The per-file path progress bar redraws at most every PROGRESS_MININTERVAL seconds.",
+    "FEATURE: deduplication_strategy (KEEP_OLDEST / KEEP_NEWEST) is bound into the primary query's ORDER BY once at init.",
+    "PERFORMANCE: is_primary is set by one set-based UPDATE over the window query instead of a reset plus per-file_id executemany.",
+    "PERFORMANCE: Filename sanitizing uses str.translate with a prebuilt table instead of re.sub.",
+    "PERFORMANCE: The today fallback formats year/month from integers instead of two strftime() calls.",
+    "PERFORMANCE: Original-name stems come from os.path.basename/splitext instead of building a Path per primary.",
+    "PERFORMANCE: rename_on_copy is read once per run and passed down instead of looked up in the config for every primary."
 ]
 _PATCH_VERSION = len(_CHANGELOG_ENTRIES)
 # Version: 0.8.14
 # ------------------------------------------------------------------------------
-from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Set
+from typing import Dict, List, Tuple, Optional, Set, Iterator
 import os
 import argparse
 import datetime
-import re
 import sys
+from functools import lru_cache
 from tqdm import tqdm
 
 import config
 from database_manager import DatabaseManager
 from config_manager import ConfigManager 
 
+# Rows pulled from the SQLite cursor per fetchmany()
+FETCH_BATCH_SIZE = 10000
+# Seconds between redraws of per-file progress bars; the per-row work is now cheaper than a terminal write
+PROGRESS_MININTERVAL = 0.5
+
+# Window ordering per deduplication_strategy; ties go to the shortest path, then the first scanned
+PRIMARY_ORDER_BY: Dict[str, str] = {
+    'KEEP_OLDEST': "date_modified ASC, LENGTH(path) ASC, file_id ASC",
+    'KEEP_NEWEST': "date_modified DESC, LENGTH(path) ASC, file_id ASC",
+}
+DEFAULT_STRATEGY = 'KEEP_OLDEST'
+
+# Templates are filled in once per Deduplicator, so the connection's statement cache keeps them compiled between runs
+# Ranks every instance within its content_hash; rn = 1 is the primary
+PRIMARY_WINDOW_SQL = """
+    SELECT 
+        content_hash, 
+        file_id, 
+        path, 
+        date_modified,
+        ROW_NUMBER() OVER (
+            PARTITION BY content_hash 
+            ORDER BY {order_by}
+        ) AS rn
+    FROM FilePathInstances
+"""
+PRIMARY_SELECT_SQL = """
+SELECT 
+    p.content_hash, 
+    p.file_id, 
+    p.path, 
+    mc.date_best,
+    p.date_modified
+FROM ({window}) p
+JOIN MediaContent mc ON p.content_hash = mc.content_hash
+WHERE p.rn = 1
+ORDER BY p.content_hash ASC;
+"""
+# Sets every flag in one pass; the IN list is built once by SQLite, not shipped back and forth through Python
+PRIMARY_FLAG_SQL = """
+UPDATE FilePathInstances 
+SET is_primary = (file_id IN (SELECT file_id FROM ({window}) WHERE rn = 1));
+"""
+# Every instance beyond the first of each hash is a duplicate, so the engine can total them directly
+INSTANCE_TOTALS_SQL = "SELECT COUNT(DISTINCT content_hash), COUNT(*) - COUNT(DISTINCT content_hash) FROM FilePathInstances;"
+
+@lru_cache(maxsize=4096)
+def _slice_year_month(date_str: str) -> Optional[Tuple[str, str]]:
+    """
+    Returns (YYYY, MM) if the first word of date_str is a valid '%Y-%m-%d' date, else None.
+    Zero-padded 'YYYY-MM-DD' (the scanner's own format) is sliced directly; anything else goes through strptime.
+    """
+    if not date_str:
+        return None
+    try:
+        year, month, day = date_str[0:4], date_str[5:7], date_str[8:10]
+        if date_str[4:5] == '-' and date_str[7:8] == '-' and date_str[10:11] in ('', ' ') and (year + month + day).isascii() and (year + month + day).isdigit():
+            # date() rejects month 13, day 0, Feb 30 etc. exactly like strptime
+            datetime.date(int(year), int(month), int(day))
+            return year, month
+        parsed = datetime.datetime.strptime(date_str.split()[0], '%Y-%m-%d')
+    except (ValueError, IndexError):
+        return None
+    return f"{parsed.year:04d}", f"{parsed.month:02d}"
+
+def _resolve_year_month(date_best_str: str, date_fs_str: str) -> Tuple[str, str]:
+    """
+    Returns the (YYYY, MM) folder pair for a file.
+    Priority: date_best (Metadata) -> date_fs (FileSystem) -> Today
+    """
+    # 1. Try Metadata Date, 2. File System Date (Fallback)
+    year_month = _slice_year_month(date_best_str) or _slice_year_month(date_fs_str)
+    if year_month:
+        return year_month
+        
+    # 3. Ultimate Fallback (Today) - Should rarely happen if scanned correctly
+    today = datetime.date.today()
+    return f"{today.year:04d}", f"{today.month:02d}"
+
+def _build_renamed_path(output_dir: str, content_hash: str, file_id: int, ext: str, date_best_str: str, date_fs_str: str) -> str:
+    """Builds the hash-named destination used when rename_on_copy is enabled."""
+    year, month = _resolve_year_month(date_best_str, date_fs_str)
+    return f"{output_dir}{os.sep}{year}{os.sep}{month}{os.sep}{content_hash[:12]}_{file_id}{ext}"
+
 class Deduplicator:
     """
     Identifies duplicate file content and selects a single 'primary' copy.
@@ -34,134 +138,93 @@ class Deduplicator:
         self.processed_count = 0
         self.duplicates_found = 0
         self.assigned_paths: Set[str] = set()
+        # OUTPUT_DIR builds a new Path on every access; resolve it to a string once
+        self._output_dir_str = os.fspath(self.config.OUTPUT_DIR).rstrip(os.sep)
+        
+        # Bind the strategy into the SQL now instead of branching on it per run
+        self.strategy = self.config.ORGANIZATION_PREFS.get('deduplication_strategy', DEFAULT_STRATEGY)
+        if self.strategy not in PRIMARY_ORDER_BY:
+            print(f"Warning: Unknown deduplication_strategy '{self.strategy}', falling back to {DEFAULT_STRATEGY}.")
+            self.strategy = DEFAULT_STRATEGY
+        window_sql = PRIMARY_WINDOW_SQL.format(order_by=PRIMARY_ORDER_BY[self.strategy])
+        self._primary_query = PRIMARY_SELECT_SQL.format(window=window_sql)
+        self._primary_flag_query = PRIMARY_FLAG_SQL.format(window=window_sql)
+
+    # Characters Windows refuses in filenames, mapped to '_' in a single C-level pass
+    _SANITIZE_TABLE = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
 
     def _sanitize_filename(self, name: str) -> str:
-        return re.sub(r'[<>:"/\\|?*]', '_', name)
-
-    def _parse_date(self, date_str: str) -> Optional[datetime.datetime]:
-        """Attempts to parse a date string into a datetime object."""
-        if not date_str or date_str == "Unknown":
-            return None
-        try:
-            # Handle YYYY-MM-DD HH:MM:SS
-            return datetime.datetime.strptime(date_str.split('.')[0], '%Y-%m-%d %H:%M:%S')
-        except:
-            try:
-                # Handle YYYY-MM-DD
-                return datetime.datetime.strptime(date_str.split()[0], '%Y-%m-%d')
-            except:
-                return None
-
-    def _calculate_final_path(self, primary_path: str, content_hash: str, ext: str, primary_file_id: int, date_best_str: str, date_fs_str: str) -> str:
+        return name.translate(self._SANITIZE_TABLE)
+
+    def _calculate_final_path(self, primary_path: str, content_hash: str, ext: str, primary_file_id: int, date_best_str: str, date_fs_str: str, rename_enabled: Optional[bool] = None) -> str:
         """
         Calculates the final, organized path.
         Priority: date_best (Metadata) -> date_fs (FileSystem) -> Today
+        Batch callers pass rename_enabled; otherwise it is read from the configuration.
         """
-        date_obj = None
-        
-        # 1. Try Metadata Date
-        if date_best_str:
-            try:
-                date_obj = datetime.datetime.strptime(date_best_str.split()[0], '%Y-%m-%d')
-            except: pass
-            
-        # 2. Try File System Date (Fallback)
-        if not date_obj and date_fs_str:
-            try:
-                date_obj = datetime.datetime.strptime(date_fs_str.split()[0], '%Y-%m-%d')
-            except: pass
-            
-        # 3. Ultimate Fallback (Today) - Should rarely happen if scanned correctly
-        if not date_obj:
-            date_obj = datetime.datetime.now()
-            
-        year = date_obj.strftime('%Y')
-        month = date_obj.strftime('%m')
-        
         # Check Configuration
-        rename_enabled = self.config.ORGANIZATION_PREFS.get('rename_on_copy', True)
+        if rename_enabled is None:
+            rename_enabled = self.config.ORGANIZATION_PREFS.get('rename_on_copy', True)
         
         if rename_enabled:
-            hash_prefix = content_hash[:12]
-            filename = f"{hash_prefix}_{primary_file_id}{ext}"
-        else:
-            original_name = Path(primary_path).stem
-            safe_name = self._sanitize_filename(original_name)
-            filename = f"{safe_name}{ext}"
-            
-            rel_check = f"{year}/{month}/{filename}"
-            if rel_check in self.assigned_paths:
-                filename = f"{safe_name}_{primary_file_id}{ext}"
-
-        relative_path = Path(year) / month / filename
-        final_path = self.config.OUTPUT_DIR / relative_path
+            # Hash-based names are unique, so no collision tracking is required
+            return _build_renamed_path(self._output_dir_str, content_hash, primary_file_id, ext, date_best_str, date_fs_str)
+        
+        year, month = _resolve_year_month(date_best_str, date_fs_str)
+        
+        original_name = os.path.splitext(os.path.basename(primary_path))[0]
+        safe_name = self._sanitize_filename(original_name)
+        filename = f"{safe_name}{ext}"
+        
+        rel_check = f"{year}/{month}/{filename}"
+        if rel_check in self.assigned_paths:
+            filename = f"{safe_name}_{primary_file_id}{ext}"
         
         self.assigned_paths.add(f"{year}/{month}/{filename}")
         
-        return str(final_path)
+        return f"{self._output_dir_str}{os.sep}{year}{os.sep}{month}{os.sep}{filename}"
+
+    def _calculate_final_paths(self, primary_rows: List[Tuple[str, int, str, str, str]]) -> Iterator[Tuple[str, str]]:
+        """
+        Yields (new_path_id, content_hash) for every primary, one at a time.
+        Each path costs a couple of microseconds, less than pickling its row to a worker process would.
+        """
+        rename_enabled = self.config.ORGANIZATION_PREFS.get('rename_on_copy', True)
+        for content_hash, file_id, path_str, date_best, date_fs in tqdm(primary_rows, desc="Calculating Paths", unit="file", mininterval=PROGRESS_MININTERVAL):
+            ext = os.path.splitext(path_str)[1]
+            # Pass both dates to calculation
+            final_path = self._calculate_final_path(path_str, content_hash, ext, file_id, date_best, date_fs, rename_enabled)
+            yield (final_path, content_hash)
 
     def run_deduplication(self):
-        print("Resetting previous deduplication state...")
-        self.db.execute_query("UPDATE FilePathInstances SET is_primary = 0;")
+        self.db.enable_bulk_writes()
         
-        print("Fetching all file instances (this may take a moment)...")
-        # Added fpi.date_modified to query for fallback
-        query = """
-        SELECT 
-            fpi.content_hash, 
-            fpi.file_id, 
-            fpi.path, 
-            mc.date_best,
-            fpi.date_modified
-        FROM FilePathInstances fpi
-        JOIN MediaContent mc ON fpi.content_hash = mc.content_hash
-        ORDER BY 
-            fpi.content_hash ASC, 
-            fpi.date_modified ASC, 
-            LENGTH(fpi.path) ASC, 
-            fpi.file_id ASC;
-        """
-        all_rows = self.db.execute_query(query)
+        print("Selecting primary copies (this may take a moment)...")
+        total_unique, duplicates = self.db.execute_query(INSTANCE_TOTALS_SQL)[0]
         
-        print(f"Processing {len(all_rows)} instances...")
+        print(f"Processing {total_unique} unique files...")
         
-        seen_hashes: Set[str] = set()
         self.assigned_paths.clear()
         
-        primary_id_updates: List[Tuple[int]] = []
-        media_content_updates: List[Tuple[str, str]] = []
-        
-        self.duplicates_found = 0
-        self.processed_count = 0
+        primary_rows: List[Tuple[str, int, str, str, str]] = []
 
-        with tqdm(total=len(all_rows), desc="Deduplicating", unit="file") as pbar:
-            for content_hash, file_id, path_str, date_best, date_fs in all_rows:
-                pbar.update(1)
-                
-                if content_hash not in seen_hashes:
-                    seen_hashes.add(content_hash)
-                    
-                    primary_id_updates.append((file_id,))
-                    
-                    ext = Path(path_str).suffix
-                    # Pass both dates to calculation
-                    final_path = self._calculate_final_path(path_str, content_hash, ext, file_id, date_best, date_fs)
-                    
-                    media_content_updates.append((final_path, content_hash))
-                    self.processed_count += 1
-                else:
-                    self.duplicates_found += 1
+        with tqdm(total=total_unique, desc="Deduplicating", unit="file") as pbar:
+            for batch in self.db.execute_batches(self._primary_query, batch_size=FETCH_BATCH_SIZE):
+                primary_rows.extend(batch)
+                pbar.update(len(batch))
+
+        self.processed_count = len(primary_rows)
+        self.duplicates_found = duplicates
+
+        media_content_updates = self._calculate_final_paths(primary_rows)
 
         print("Committing updates to database...")
         
-        if primary_id_updates:
-            self.db.execute_many(
-                "UPDATE FilePathInstances SET is_primary = 1 WHERE file_id = ?;", 
-                primary_id_updates
-            )
-            
-        if media_content_updates:
-            self.db.execute_many(
+        # Flags + path updates share one transaction: a single commit, and no half-applied state on failure.
+        # executemany pulls from a generator on the serial path, so no second copy of the primaries is built.
+        with self.db.transaction() as cursor:
+            cursor.execute(self._primary_flag_query)
+            cursor.executemany(
                 "UPDATE MediaContent SET new_path_id = ? WHERE content_hash = ?;",
                 media_content_updates
             )
@@ -5,22 +5,61 @@ _MAJOR_VERSION = 0
 _MINOR_VERSION = 1
 _REL_CHANGES = [11]
 _CHANGELOG_ENTRIES = [
-    "Released as v0.1.0"
+    "Released as v0.1.0",
+    "PERFORMANCE: Hashing uses hashlib.file_digest (3.11+) or readinto on one reused buffer instead of allocating a bytes object per chunk.",
+    "PERFORMANCE: The verification re-hash is opt-in via --verify-hash instead of reading every file twice.",
+    "PERFORMANCE: Hashing and metadata extraction run in a process pool (--workers); only DB writes stay on the main process.",
+    "PERFORMANCE: DB writes are committed in transactions of DB_BATCH_SIZE files instead of one connection + commit per file.",
+    "PERFORMANCE: Fast-skip check reads all known (path, size) pairs once into a dict instead of one JOIN query per file.",
+    "PERFORMANCE: The demo database runs with WAL + synchronous=NORMAL (enable_bulk_writes) for its batched commits.",
+    "PERFORMANCE: Existing metadata is fetched per write batch with chunked IN queries instead of one SELECT per file.",
+    "PERFORMANCE: Fast skip keys on (path, size, mtime); path rows record the file's mtime and are refreshed when a file changes.",
+    "PERFORMANCE: compare_metadata() short-circuits on dict equality and only stringifies values that differ.",
+    "PERFORMANCE: Assets are enumerated with os.scandir (one cached stat per file); full paths join onto a root resolved once.",
+    "PERFORMANCE: Workers return the metadata dict; it is compared directly and only serialized (compactly) when inserted or updated.",
+    "PERFORMANCE: Media group and extractor come from EXT_GROUPS / GROUP_EXTRACTORS lookups instead of an if/elif chain of list literals.",
+    "PERFORMANCE: The per-file byte bar redraws at most every PROGRESS_MININTERVAL seconds with smoothing off.",
+    "PERFORMANCE: The fallback hashing buffer is allocated once per process instead of once per file.",
+    "PERFORMANCE: MediaContent inserts and metadata updates share one upsert executemany per batch.",
+    "PERFORMANCE: Off Linux, files over MMAP_MIN_SIZE are hashed from a read-only mmap (MADV_SEQUENTIAL) without per-chunk copies.",
+    "PERFORMANCE: Image width/height come from an optional imagesize header probe, falling back to Image.open when it is missing or fails.",
+    "FIX: MD5 is created with usedforsecurity=False (3.9+), so FIPS-mode OpenSSL builds can still fingerprint content.",
+    "PERFORMANCE: Workers serialize metadata to compact JSON; identical stored JSON is skipped without decoding either side.",
+    "FIX: The scandir walk skips symlinked and unreadable directories again, as rglob did.",
+    "FIX: A batch that fails to write is retried row by row, so one bad file is logged and skipped instead of losing the batch; the DB is always closed.",
+    "FIX: imagesize is only trusted when the file's signature matches its extension (no MPF segment, no EXIF rotation); anything else falls back to Image.open."
 ]
 _PATCH_VERSION = len(_CHANGELOG_ENTRIES)
 # Version: 0.3.22
 # ------------------------------------------------------------------------------
+import os
 import sys
 import argparse
 import json
 import hashlib
+import mmap
+import sqlite3
+import datetime
+import concurrent.futures
+import inspect
+import io
 from pathlib import Path
+from typing import Optional, Tuple, Any, Dict, Set, Iterator
 from PIL import Image
 from tqdm import tqdm
 
+try:
+    import imagesize
+    IMAGESIZE_AVAILABLE = True
+    # imagesize 2.x swaps width/height for EXIF-rotated JPEGs by default; Pillow reports stored dimensions
+    IMAGESIZE_KWARGS = {'exif_rotation': False} if 'exif_rotation' in inspect.signature(imagesize.get).parameters else {}
+except ImportError:
+    IMAGESIZE_AVAILABLE = False
+
 # Ensure project root is in path
 sys.path.insert(0, str(Path(__file__).parent))
 
+import config
 from libraries_helper import get_library_versions, get_video_metadata
 from database_manager import DatabaseManager
 from base_assets import ImageAsset, GenericFileAsset, AudioAsset
@@ -30,51 +69,291 @@ from video_asset import VideoAsset
 TEST_ASSETS_DIR = Path("test_assets")
 DEMO_OUTPUT_DIR = Path("demo")
 DEMO_DB_PATH = DEMO_OUTPUT_DIR / "metadata.sqlite"
+HASH_CHUNK_SIZE = 1024 * 1024  # Read size for the pre-3.11 hashing fallback (and the mmap digest step)
+MMAP_MIN_SIZE = 16 << 20  # Off Linux, files above this are hashed from a read-only mapping instead of read()
+POOL_CHUNKSIZE = 16  # Files handed to a worker process per task
+DB_BATCH_SIZE = 1000  # Files per write transaction
+PROGRESS_MININTERVAL = 0.5  # Seconds between redraws of the per-file byte bar
+# The hash is a content fingerprint, not a security primitive; FIPS-mode OpenSSL refuses MD5 without this flag (3.9+)
+HASH_KWARGS = {'usedforsecurity': False} if sys.version_info >= (3, 9) else {}
+SQL_IN_CHUNK = 500  # Placeholders per IN (...) lookup; stays under SQLite's variable limit on old builds
+
+# New content is inserted; known content whose metadata changed only gets its backpack refreshed
+UPSERT_MEDIA_SQL = """
+    INSERT INTO MediaContent (
+        content_hash, size, file_type_group, width, height, 
+        duration, bitrate, video_codec, extended_metadata
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(content_hash) DO UPDATE SET 
+        extended_metadata = excluded.extended_metadata
+"""
+# A re-scanned path may now hold different content, so its hash and mtime are refreshed rather than ignored
+INSERT_PATH_SQL = """
+    INSERT INTO FilePathInstances 
+    (content_hash, path, original_full_path, original_relative_path, date_modified) 
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(path) DO UPDATE SET 
+        content_hash = excluded.content_hash, 
+        date_modified = excluded.date_modified
+"""
+
+def _new_md5():
+    return hashlib.md5(**HASH_KWARGS)
+
+class _ProgressReader:
+    """Forwards readinto() to a binary file and reports each chunk to a progress bar."""
+
+    def __init__(self, raw, pbar: tqdm):
+        self._raw = raw
+        self._pbar = pbar
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = self._raw.readinto(buffer)
+        if size:
+            self._pbar.update(size)
+        return size
 
-def calculate_file_hash_with_progress(file_path: Path, pbar_inner: tqdm) -> str:
-    """Calculates MD5 hash while updating the per-file progress bar."""
-    hash_md5 = hashlib.md5()
+# Read buffer for the pre-3.11 fallback, allocated once per process (each pool worker gets its own)
+_hash_buffer: Optional[memoryview] = None
+
+def _get_hash_buffer() -> memoryview:
+    global _hash_buffer
+    if _hash_buffer is None:
+        _hash_buffer = memoryview(bytearray(HASH_CHUNK_SIZE))
+    return _hash_buffer
+
+def _hash_mapped(f, pbar_inner: Optional[tqdm]) -> str:
+    """MD5 of an open file via a sequential read-only mapping, stepping a memoryview so no chunk is copied."""
+    hash_md5 = _new_md5()
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # madvise is POSIX-only (absent on Windows)
+        if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        with memoryview(mm) as view:
+            for offset in range(0, len(mm), HASH_CHUNK_SIZE):
+                chunk = view[offset:offset + HASH_CHUNK_SIZE]
+                hash_md5.update(chunk)
+                if pbar_inner is not None:
+                    pbar_inner.update(len(chunk))
+                chunk.release()
+    return hash_md5.hexdigest()
+
+def calculate_file_hash_with_progress(file_path: Path, pbar_inner: Optional[tqdm] = None, file_size: Optional[int] = None) -> str:
+    """Calculates MD5 hash while updating the per-file progress bar (if one is given)."""
     try:
-        file_size = file_path.stat().st_size
-        pbar_inner.reset(total=file_size)
-        pbar_inner.set_description(f"  Hashing: {file_path.name[:20]}...")
+        if file_size is None:
+            file_size = file_path.stat().st_size
+        if pbar_inner is not None:
+            pbar_inner.reset(total=file_size)
+            pbar_inner.set_description(f"  Hashing: {file_path.name[:20]}...")
         
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(1024 * 1024), b""): 
-                hash_md5.update(chunk)
-                pbar_inner.update(len(chunk))
+        # Unbuffered: chunks are read straight into the digest's buffer, with no intermediate bytes objects
+        with open(file_path, "rb", buffering=0) as f:
+            # Linux keeps read(): its readahead already matches the mapping, without the page-fault cost
+            if sys.platform != 'linux' and file_size > MMAP_MIN_SIZE:
+                return _hash_mapped(f, pbar_inner)
+            
+            reader = _ProgressReader(f, pbar_inner) if pbar_inner is not None else f
+            if hasattr(hashlib, 'file_digest'):
+                # Python 3.11+: stdlib loop over one reused buffer
+                return hashlib.file_digest(reader, _new_md5).hexdigest()
+            
+            hash_md5 = _new_md5()
+            view = _get_hash_buffer()
+            while size := reader.readinto(view):
+                hash_md5.update(view[:size])
+            return hash_md5.hexdigest()
     except PermissionError:
         return "PERMISSION_DENIED"
-    return hash_md5.hexdigest()
 
-def get_hash_by_path_and_size(db, rel_path, size):
-    """Checks if we already have a hash for this specific file path and size."""
+def iter_asset_files(root: Path) -> Iterator[Tuple[Path, str, os.stat_result]]:
+    """
+    Walks root with os.scandir, yielding (path, relative path, stat) for every file with an extension.
+    The stat comes from the directory entry, so each file costs one stat() at most (none on Windows).
+    Like rglob, symlinked directories are not followed (a link to a parent would loop forever)
+    and directories that can't be read are skipped.
+    """
+    pending_dirs = [(str(root), "")]
+    while pending_dirs:
+        dir_path, rel_dir = pending_dirs.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            if entry.is_dir():
+                if not entry.is_symlink():
+                    pending_dirs.append((entry.path, rel_path))
+            elif '.' in entry.name and entry.is_file():
+                yield Path(entry.path), rel_path, entry.stat()
+
+def load_known_files(db: DatabaseManager) -> Dict[Tuple[str, int, str], str]:
+    """Loads every known (relative path, size, mtime) -> hash entry in one query for the fast-skip check."""
     query = """
-        SELECT mc.content_hash 
+        SELECT fpi.original_relative_path, mc.size, fpi.date_modified, mc.content_hash 
         FROM MediaContent mc
         JOIN FilePathInstances fpi ON mc.content_hash = fpi.content_hash
-        WHERE fpi.original_relative_path = ? AND mc.size = ?
     """
-    res = db.execute_query(query, (rel_path, size))
-    return res[0][0] if res else None
+    return {(rel_path, size, date_mod): content_hash for rel_path, size, date_mod, content_hash in db.execute_query(query)}
 
-def get_existing_metadata(db: DatabaseManager, content_hash: str) -> dict:
-    res = db.execute_query("SELECT extended_metadata FROM MediaContent WHERE content_hash = ?", (content_hash,))
-    return json.loads(res[0][0]) if res else None
+def load_existing_metadata(db: DatabaseManager, content_hashes: Set[str]) -> Dict[str, str]:
+    """Fetches stored metadata JSON for many hashes at once, SQL_IN_CHUNK placeholders per query."""
+    hashes = list(content_hashes)
+    existing = {}
+    for i in range(0, len(hashes), SQL_IN_CHUNK):
+        chunk = hashes[i:i + SQL_IN_CHUNK]
+        placeholders = ", ".join("?" * len(chunk))
+        rows = db.execute_query(f"SELECT content_hash, extended_metadata FROM MediaContent WHERE content_hash IN ({placeholders})", tuple(chunk))
+        existing.update(rows)
+    return existing
 
 def compare_metadata(old_meta: dict, new_meta: dict) -> list:
     """Compares metadata and returns list of changed keys."""
-    diffs = []
-    for k, v in new_meta.items():
-        if k not in old_meta or str(old_meta[k]) != str(v):
-            diffs.append(k)
-    return diffs
+    # Common case on re-scans: nothing changed, settled by one C-level dict comparison
+    if old_meta == new_meta:
+        return []
+    # Values are only stringified when they differ as-is (e.g. 1920 vs "1920")
+    return [
+        k for k, v in new_meta.items()
+        if k not in old_meta or (old_meta[k] != v and str(old_meta[k]) != str(v))
+    ]
+
+# Extension -> (leading bytes, Pillow format name). imagesize's result is only used when the file's
+# signature matches its extension, so it stores the same "Format" value Image.open would
+IMAGE_SIGNATURES: Dict[str, Tuple[bytes, str]] = {
+    '.jpg': (b'\xff\xd8\xff', 'JPEG'),
+    '.jpeg': (b'\xff\xd8\xff', 'JPEG'),
+    '.png': (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    '.bmp': (b'BM', 'BMP'),
+}
+IMAGE_HEAD_BYTES = 128 * 1024  # Covers a JPEG's APPn segments (EXIF is at most 64 KiB) up to the frame header
+
+def _jpeg_is_plain(head: bytes) -> bool:
+    """
+    True if the JPEG markers reach a frame header inside head without an APP2 'MPF' segment.
+    MPF files may be opened by Pillow as 'MPO', and a head that ends early can't be judged.
+    """
+    i = 2
+    while i + 4 <= len(head):
+        if head[i] != 0xFF:
+            return False
+        marker = head[i + 1]
+        if marker == 0xFF:
+            i += 1  # Fill byte
+            continue
+        if marker == 0xDA or (0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC)):
+            return True  # SOS / SOFn: no more APPn segments
+        if marker == 0xE2 and head[i + 4:i + 8] == b'MPF\x00':
+            return False
+        i += 2 + int.from_bytes(head[i + 2:i + 4], 'big')
+    return False
+
+def _probe_image_header(file_path: Path) -> Optional[bytes]:
+    """Returns the file's head when imagesize can stand in for Image.open, None when Pillow must decide."""
+    signature = IMAGE_SIGNATURES.get(file_path.suffix.lower())
+    if signature is None:
+        return None
+    with open(file_path, 'rb') as f:
+        head = f.read(IMAGE_HEAD_BYTES)
+    if not head.startswith(signature[0]):
+        return None  # e.g. a PNG saved as .jpg: Pillow reports what the content is
+    if signature[1] == 'JPEG' and not _jpeg_is_plain(head):
+        return None
+    return head
+
+def _extract_image(file_path: Path, raw_meta: Dict[str, Any]) -> Any:
+    # imagesize reads just the SOI/IHDR/BMP header. Any doubt (mismatched or MPF signature,
+    # a -1 size, an exception) is a miss, and Pillow takes over
+    if IMAGESIZE_AVAILABLE:
+        try:
+            head = _probe_image_header(file_path)
+            if head is not None:
+                width, height = imagesize.get(io.BytesIO(head), **IMAGESIZE_KWARGS)
+                if width >= 0 and height >= 0:
+                    raw_meta.update({"Width": width, "Height": height, "Format": IMAGE_SIGNATURES[file_path.suffix.lower()][1]})
+                    return ImageAsset(file_path, raw_meta)
+        except Exception:
+            pass
+    
+    # Header probe only: size/format are known after open(); never call load() here, it decodes every pixel
+    with Image.open(file_path) as img:
+        raw_meta.update({"Width": img.width, "Height": img.height, "Format": img.format})
+        return ImageAsset(file_path, raw_meta)
+
+def _extract_video(file_path: Path, raw_meta: Dict[str, Any]) -> Any:
+    raw_meta.update(get_video_metadata(file_path))
+    return VideoAsset(file_path, raw_meta)
+
+def _extract_audio(file_path: Path, raw_meta: Dict[str, Any]) -> Any:
+    raw_meta.update(get_video_metadata(file_path)) 
+    return AudioAsset(file_path, raw_meta)
+
+# Extension -> media group, and media group -> extractor: one dict lookup each instead of an if/elif list chain
+EXT_GROUPS: Dict[str, str] = {
+    **dict.fromkeys(['.jpg', '.jpeg', '.png', '.bmp'], "IMAGE"),
+    **dict.fromkeys(['.mp4', '.avi', '.mov', '.mkv', '.wmv', '.mpg', '.ts'], "VIDEO"),
+    **dict.fromkeys(['.mp3', '.wav', '.flac', '.m4a', '.wma', '.ogg'], "AUDIO"),
+}
+GROUP_EXTRACTORS = {
+    "IMAGE": _extract_image,
+    "VIDEO": _extract_video,
+    "AUDIO": _extract_audio,
+}
+
+def extract_asset(file_path: Path, file_size: int) -> Tuple[str, Any]:
+    """Reads format-specific metadata and wraps it in the matching asset class."""
+    media_group = EXT_GROUPS.get(file_path.suffix.lower(), "GENERIC")
+    raw_meta = {"OS_File_Size": file_size}
+    extractor = GROUP_EXTRACTORS.get(media_group)
+    if extractor is None:
+        return media_group, GenericFileAsset(file_path, raw_meta)
+    return media_group, extractor(file_path, raw_meta)
+
+def scan_file(job: Tuple[Path, str, int, bool], pbar_inner: Optional[tqdm] = None) -> Tuple[str, Optional[tuple], Optional[str]]:
+    """
+    Worker function: hashes one file and extracts its metadata. Touches no database.
+    Returns (rel_path, (content_hash, media_group, content_columns, metadata JSON) or None, error).
+    """
+    file_path, rel_path, file_size, verify_hash = job
+    try:
+        # --- STEP 2: HASHING (OPTIONAL VERIFICATION) ---
+        content_hash = calculate_file_hash_with_progress(file_path, pbar_inner, file_size)
+        if content_hash == "PERMISSION_DENIED":
+            return rel_path, None, None
+        
+        # Re-hash to confirm consistency only when asked: it doubles the read cost of every file
+        if verify_hash:
+            verify = calculate_file_hash_with_progress(file_path, pbar_inner, file_size)
+            if content_hash != verify:
+                tqdm.write(f"[WARN] Hash mismatch on {rel_path}. Retrying final verification...")
+                content_hash = calculate_file_hash_with_progress(file_path, pbar_inner, file_size)
+
+        # --- STEP 3: METADATA EXTRACTION ---
+        media_group, asset = extract_asset(file_path, file_size)
+        content_columns = (
+            asset.size_bytes, 
+            getattr(asset, 'width', 0), getattr(asset, 'height', 0), 
+            getattr(asset, 'duration', 0), getattr(asset, 'bitrate', "N/A"),
+            getattr(asset, 'video_codec', "N/A")
+        )
+        # Serialized here, in parallel, so the main process only ships the string to SQLite
+        meta_json = json.dumps(asset.get_full_dict(), separators=(',', ':'))
+        return rel_path, (content_hash, media_group, content_columns, meta_json), None
+    except Exception as e:
+        return rel_path, None, str(e)
 
 def run_demo():
     parser = argparse.ArgumentParser(description="High-Performance Resumable Media Scanner")
     parser.add_argument('-v', '--version', action='store_true', help="Show version and exit")
     parser.add_argument('--changes', nargs='?', const='all', help='Show changelog history.')
     parser.add_argument('--debug', action='store_true', help="Enable debug output")
+    parser.add_argument('--verify-hash', action='store_true', help="Re-hash every file to confirm a consistent read (doubles disk I/O)")
+    parser.add_argument('--workers', type=int, default=config.HASHING_THREADS, help=f"Hashing/metadata processes; 1 scans inline with a per-file progress bar (default: {config.HASHING_THREADS})")
     args = parser.parse_args()
 
     # --- RESTORED VERSION SUPPORT ---
@@ -89,103 +368,127 @@ def run_demo():
 
     DEMO_OUTPUT_DIR.mkdir(exist_ok=True)
     db = DatabaseManager(str(DEMO_DB_PATH))
-    db.create_schema()
+    try:
+        db.create_schema()
+        db.enable_bulk_writes()
 
-    if not TEST_ASSETS_DIR.exists():
-        print(f"ERROR: '{TEST_ASSETS_DIR}' not found.")
-        return
+        if not TEST_ASSETS_DIR.exists():
+            print(f"ERROR: '{TEST_ASSETS_DIR}' not found.")
+            return
 
-    asset_files = [f for f in TEST_ASSETS_DIR.rglob("*.*") if f.is_file()]
+        asset_files = list(iter_asset_files(TEST_ASSETS_DIR))
+        # Resolved once; each file's full path is joined onto it instead of resolving every file
+        assets_root = str(TEST_ASSETS_DIR.resolve())
     
-    pbar_outer = tqdm(total=len(asset_files), desc="OVERALL PROGRESS", position=0, leave=True)
-    pbar_inner = tqdm(total=0, desc="  FILE PROGRESS   ", position=1, leave=False, unit='B', unit_scale=True)
+        pbar_outer = tqdm(total=len(asset_files), desc="OVERALL PROGRESS", position=0, leave=True)
 
-    stats = {"new": 0, "updated": 0, "skipped": 0}
+        stats = {"new": 0, "updated": 0, "skipped": 0}
 
-    for file_path in asset_files:
-        ext = file_path.suffix.lower()
-        rel_path = str(file_path.relative_to(TEST_ASSETS_DIR))
-        file_size = file_path.stat().st_size
-        
-        try:
-            # --- STEP 1: FAST SKIP (Check Path + Size) ---
-            existing_hash = get_hash_by_path_and_size(db, rel_path, file_size)
-            if existing_hash:
+        # --- STEP 1: FAST SKIP (Check Path + Size + Modified Time) ---
+        # Unchanged files are never opened; the stored hash is still valid
+        known_files = load_known_files(db)
+        jobs = []
+        file_paths = {}
+        for file_path, rel_path, file_stat in asset_files:
+            # Same mtime format as FileScanner, so both tools agree on what "unchanged" means
+            date_modified = datetime.datetime.fromtimestamp(file_stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+            if (rel_path, file_stat.st_size, date_modified) in known_files:
                 stats['skipped'] += 1
                 pbar_outer.update(1)
-                continue 
-
-            # --- STEP 2: HASHING WITH VERIFICATION ---
-            content_hash = calculate_file_hash_with_progress(file_path, pbar_inner)
-            if content_hash == "PERMISSION_DENIED":
                 continue
-            
-            # User requirement: re-hash to confirm consistency
-            verify_hash = calculate_file_hash_with_progress(file_path, pbar_inner)
-            if content_hash != verify_hash:
-                pbar_outer.write(f"[WARN] Hash mismatch on {rel_path}. Retrying final verification...")
-                content_hash = calculate_file_hash_with_progress(file_path, pbar_inner)
-
-            # --- STEP 3: METADATA EXTRACTION ---
-            old_meta = get_existing_metadata(db, content_hash)
-            raw_meta = {"OS_File_Size": file_size}
-            asset, media_group = None, "UNKNOWN"
-
-            if ext in ['.jpg', '.jpeg', '.png', '.bmp']:
-                media_group = "IMAGE"
-                with Image.open(file_path) as img:
-                    raw_meta.update({"Width": img.width, "Height": img.height, "Format": img.format})
-                    asset = ImageAsset(file_path, raw_meta)
-            elif ext in ['.mp4', '.avi', '.mov', '.mkv', '.wmv', '.mpg', '.ts']:
-                media_group = "VIDEO"
-                raw_meta.update(get_video_metadata(file_path))
-                asset = VideoAsset(file_path, raw_meta)
-            elif ext in ['.mp3', '.wav', '.flac', '.m4a', '.wma', '.ogg']:
-                media_group = "AUDIO"
-                raw_meta.update(get_video_metadata(file_path)) 
-                asset = AudioAsset(file_path, raw_meta)
-            else:
-                media_group = "GENERIC"
-                asset = GenericFileAsset(file_path, raw_meta)
-
-            # --- STEP 4: DB PERSISTENCE (PER-FILE COMMIT) ---
-            with db:
-                new_meta_json = asset.get_full_json()
-                if old_meta is None:
-                    stats['new'] += 1
-                    db.execute_query("""
-                        INSERT INTO MediaContent (
-                            content_hash, size, file_type_group, width, height, 
-                            duration, bitrate, video_codec, extended_metadata
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        content_hash, asset.size_bytes, media_group, 
-                        getattr(asset, 'width', 0), getattr(asset, 'height', 0), 
-                        getattr(asset, 'duration', 0), getattr(asset, 'bitrate', "N/A"),
-                        getattr(asset, 'video_codec', "N/A"), new_meta_json
-                    ))
-                else:
-                    if compare_metadata(old_meta, json.loads(new_meta_json)):
-                        stats['updated'] += 1
-                        db.execute_query("UPDATE MediaContent SET extended_metadata = ? WHERE content_hash = ?", (new_meta_json, content_hash))
+            jobs.append((file_path, rel_path, file_stat.st_size, args.verify_hash))
+            file_paths[rel_path] = (file_path, os.path.join(assets_root, rel_path), date_modified)
+
+        # Hashing + extraction fan out to worker processes; SQLite has a single writer, so results come back here
+        executor, pbar_inner = None, None
+        if args.workers > 1:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=args.workers)
+            results = executor.map(scan_file, jobs, chunksize=POOL_CHUNKSIZE)
+        else:
+            # Updated per read chunk: coalesce redraws so formatting never competes with hashing
+            pbar_inner = tqdm(total=0, desc="  FILE PROGRESS   ", position=1, leave=False, unit='B', unit_scale=True,
+                              mininterval=PROGRESS_MININTERVAL, smoothing=0)
+            results = (scan_file(job, pbar_inner) for job in jobs)
+
+        # --- STEP 4: DB PERSISTENCE (BATCHED COMMITS) ---
+        # Scan results wait here until DB_BATCH_SIZE of them can be persisted together
+        pending_results = []
+
+        def persist_batch():
+            if not pending_results:
+                return
+            # One IN query per chunk of hashes instead of one SELECT per file
+            known_meta = load_existing_metadata(db, {scanned[0] for _, scanned in pending_results})
+            # Per file: (rel_path, stats key, MediaContent upsert or None, FilePathInstances row)
+            rows = []
+
+            for rel_path, (content_hash, media_group, content_columns, new_json) in pending_results:
+                file_path, full_path, date_modified = file_paths[rel_path]
+                try:
+                    old_json = known_meta.get(content_hash)
+
+                    # Identical text is settled without decoding; otherwise compare as dicts,
+                    # which tolerates older formatting and 1920 vs "1920"
+                    if old_json is None:
+                        outcome = 'new'
+                    elif old_json != new_json and compare_metadata(json.loads(old_json), json.loads(new_json)):
+                        outcome = 'updated'
                     else:
-                        stats['skipped'] += 1
+                        outcome = 'skipped'
+
+                    media_row = None
+                    if outcome != 'skipped':
+                        media_row = (content_hash, content_columns[0], media_group, *content_columns[1:], new_json)
+                        known_meta[content_hash] = new_json
 
-                db.execute_query("""
-                    INSERT OR IGNORE INTO FilePathInstances 
-                    (content_hash, path, original_full_path, original_relative_path) 
-                    VALUES (?, ?, ?, ?)
-                """, (content_hash, str(file_path), str(file_path.resolve()), rel_path))
+                    rows.append((rel_path, outcome, media_row, (content_hash, str(file_path), full_path, rel_path, date_modified)))
+                except Exception as e:
+                    pbar_outer.write(f"[ERROR] {rel_path}: {e}")
 
-        except Exception as e:
-            pbar_outer.write(f"[ERROR] {rel_path}: {e}")
+            try:
+                # Parents before children: FilePathInstances rows reference the MediaContent rows inserted here
+                with db.transaction() as cursor:
+                    cursor.executemany(UPSERT_MEDIA_SQL, [media_row for _, _, media_row, _ in rows if media_row])
+                    cursor.executemany(INSERT_PATH_SQL, [path_row for _, _, _, path_row in rows])
+                for _, outcome, _, _ in rows:
+                    stats[outcome] += 1
+            except sqlite3.Error:
+                # The batch was rolled back; write it again one file per transaction so only the bad rows are lost
+                for rel_path, outcome, media_row, path_row in rows:
+                    try:
+                        with db.transaction() as cursor:
+                            if media_row:
+                                cursor.execute(UPSERT_MEDIA_SQL, media_row)
+                            cursor.execute(INSERT_PATH_SQL, path_row)
+                        stats[outcome] += 1
+                    except sqlite3.Error as e:
+                        pbar_outer.write(f"[ERROR] {rel_path}: {e}")
+            finally:
+                pending_results.clear()
 
-        pbar_outer.update(1)
+        try:
+            for rel_path, scanned, error in results:
+                if error:
+                    pbar_outer.write(f"[ERROR] {rel_path}: {error}")
+                elif scanned:
+                    pending_results.append((rel_path, scanned))
+                    if len(pending_results) >= DB_BATCH_SIZE:
+                        persist_batch()
+
+                pbar_outer.update(1)
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+            # Also runs on Ctrl+C, so everything scanned so far is kept for the next (resumed) run
+            persist_batch()
 
-    pbar_inner.close()
-    pbar_outer.close()
-    print(f"\n--- Recursive Scan Complete ---")
-    print(f"Total: {len(asset_files)} | New: {stats['new']} | Updated: {stats['updated']} | Skipped: {stats['skipped']}")
+        if pbar_inner:
+            pbar_inner.close()
+        pbar_outer.close()
+        print(f"\n--- Recursive Scan Complete ---")
+        print(f"Total: {len(asset_files)} | New: {stats['new']} | Updated: {stats['updated']} | Skipped: {stats['skipped']}")
+    finally:
+        db.close()
 
 if __name__ == '__main__':
-    run_demo()
\ No newline at end of file
+    run_demo()
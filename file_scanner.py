@@ -4,13 +4,27 @@ _MAJOR_VERSION = 0
 _MINOR_VERSION = 1
 _REL_CHANGES = [19]
 _CHANGELOG_ENTRIES = [
-    "Released as v0.1.0"
+    "Released as v0.1.0",
+    "PERFORMANCE: Each batch writes MediaContent and FilePathInstances in one transaction, on a WAL connection (enable_bulk_writes).",
+    "PERFORMANCE: Hashing uses hashlib.file_digest (3.11+) on an unbuffered file, or readinto on one buffer, instead of a bytes object per chunk.",
+    "PERFORMANCE: The readinto hashing buffer is allocated once per hashing thread instead of once per file.",
+    "PERFORMANCE: The unchanged-file check does one dict lookup and compares size before formatting the mtime.",
+    "PERFORMANCE: The walk recurses with os.scandir and reuses each DirEntry's stat; Path objects are only built for files that need hashing.",
+    "PERFORMANCE: File groups are looked up in an extension -> group dict built once, instead of scanning every group's list per file.",
+    "PERFORMANCE: SHA256 is created with usedforsecurity=False (3.9+), allowing non-FIPS digest paths on FIPS-mode OpenSSL builds.",
+    "PERFORMANCE: Where posix_fadvise exists, files are read with SEQUENTIAL readahead and dropped from the page cache (DONTNEED) once hashed.",
+    "PERFORMANCE: Queued files stay plain path strings; relative paths are sliced off the root prefix instead of Path.relative_to per file.",
+    "PERFORMANCE: Hashing jobs are submitted through a window of INFLIGHT_PER_WORKER per thread instead of one future per file up front.",
+    "FIX: files_inserted_count comes from the batch insert's rowcount, so paths ignored as already recorded are no longer counted.",
+    "PERFORMANCE: The known-file index streams in CACHE_LOAD_BATCH rows at a time instead of materializing the whole join with fetchall().",
+    "FIX: The scandir walk uses an explicit directory stack, so very deep trees can't hit the recursion limit.",
+    "FIX: Hashed files are no longer dropped from the page cache (DONTNEED), which evicted pages other processes were using; SEQUENTIAL readahead stays."
 ]
 _PATCH_VERSION = len(_CHANGELOG_ENTRIES)
 # Version: 0.7.20
 # ------------------------------------------------------------------------------
 from pathlib import Path
-from typing import Dict, List, Tuple, Set
+from typing import Dict, List, Tuple, Set, Optional, Iterator
 import os
 import hashlib
 import datetime
@@ -18,6 +32,7 @@ import argparse
 import sys
 import sqlite3
 import concurrent.futures
+import itertools
 import queue
 import threading
 from tqdm import tqdm
@@ -38,6 +53,87 @@ DEFAULT_FILE_GROUPS: Dict[str, List[str]] = {
 UI_THRESHOLD_BYTES = 50 * 1024 * 1024
 # Commit to DB every N files
 DB_BATCH_SIZE = 1000
+# Rows fetched per step while loading the known-file index
+CACHE_LOAD_BATCH = 10000
+# Hashing jobs queued per thread; keeps futures bounded on huge scans while no thread waits for work
+INFLIGHT_PER_WORKER = 4
+
+# Linux/BSD only; macOS and Windows have no posix_fadvise
+FADVISE_AVAILABLE = hasattr(os, 'posix_fadvise')
+
+# The hash is a content fingerprint, not a security primitive (flag exists on 3.9+)
+HASH_KWARGS = {'usedforsecurity': False} if sys.version_info >= (3, 9) else {}
+
+INSERT_CONTENT_SQL = "INSERT OR IGNORE INTO MediaContent (content_hash, size, file_type_group, date_best) VALUES (?, ?, ?, ?)"
+INSERT_INSTANCE_SQL = "INSERT OR IGNORE INTO FilePathInstances (content_hash, path, original_full_path, original_relative_path, date_modified, is_primary) VALUES (?, ?, ?, ?, ?, ?)"
+
+# Hashing threads each keep one BLOCK_SIZE read buffer for their lifetime
+_thread_buffers = threading.local()
+
+def _get_hash_buffer() -> memoryview:
+    view = getattr(_thread_buffers, 'view', None)
+    if view is None:
+        view = _thread_buffers.view = memoryview(bytearray(config.BLOCK_SIZE))
+    return view
+
+def _new_sha256():
+    return hashlib.sha256(**HASH_KWARGS)
+
+def _fadvise(fd: int, advice: int):
+    # Advisory only: some file types/filesystems reject it, which never matters for the hash
+    try:
+        os.posix_fadvise(fd, 0, 0, advice)
+    except OSError:
+        pass
+
+def _sha256_file(f, pbar: Optional[tqdm] = None) -> str:
+    """
+    SHA256 of an open unbuffered binary file; advances pbar (if given) by each chunk read.
+    Each file is read once, front to back, so the kernel is told to read ahead aggressively.
+    """
+    if FADVISE_AVAILABLE:
+        _fadvise(f.fileno(), os.POSIX_FADV_SEQUENTIAL)
+    return _sha256_read(f, pbar)
+
+def _sha256_read(f, pbar: Optional[tqdm]) -> str:
+    if pbar is None and hasattr(hashlib, 'file_digest'):
+        # Python 3.11+: the read/update loop runs in C over one internal buffer
+        return hashlib.file_digest(f, _new_sha256).hexdigest()
+    
+    hasher = _new_sha256()
+    view = _get_hash_buffer()
+    while size := f.readinto(view):
+        hasher.update(view[:size])
+        if pbar is not None:
+            pbar.update(size)
+    return hasher.hexdigest()
+
+def _suffix(name: str) -> str:
+    """Lower-cased extension of a file name, with the same rules as Path.suffix."""
+    i = name.rfind('.')
+    return name[i:].lower() if 0 < i < len(name) - 1 else ''
+
+def _iter_files(directory: str, prefix: str) -> Iterator[Tuple[str, os.DirEntry]]:
+    """
+    Yields (path, entry) for every non-directory under directory, like os.walk's file lists.
+    path is prefix + the relative name, so it matches str(Path(root) / name).
+    Symlinked directories are skipped entirely; unreadable directories are skipped.
+    """
+    stack = [(directory, prefix)]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            path = prefix + entry.name
+            if entry.is_dir():
+                if not entry.is_symlink():
+                    stack.append((entry.path, path + os.sep))
+            else:
+                yield path, entry
 
 class FileScanner:
     """
@@ -49,6 +145,11 @@ class FileScanner:
         self.db = db
         self.source_dir = source_dir
         self.file_groups = file_groups
+        # First group listing an extension wins, as with the old in-order scan
+        self._ext_to_group: Dict[str, str] = {}
+        for group, extensions in file_groups.items():
+            for ext in extensions:
+                self._ext_to_group.setdefault(ext, group)
         self.files_scanned_count = 0
         self.files_inserted_count = 0
         self.known_files_cache: Dict[str, Tuple[str, int]] = {} 
@@ -60,21 +161,17 @@ class FileScanner:
         for i in range(1, self.max_workers + 1):
             self.position_pool.put(i)
 
-    def _get_file_type_group(self, file_path: Path) -> str:
-        ext = file_path.suffix.lower()
-        for group, extensions in self.file_groups.items():
-            if ext in extensions:
-                return group
-        return 'OTHER'
+    def _get_file_type_group(self, ext: str) -> str:
+        return self._ext_to_group.get(ext, 'OTHER')
 
     def _load_cache(self):
         """Pre-loads existing file paths from DB into memory."""
         print("Loading existing file index for fast resume...")
         query = "SELECT fpi.path, fpi.date_modified, mc.size FROM FilePathInstances fpi JOIN MediaContent mc ON fpi.content_hash = mc.content_hash"
         try:
-            rows = self.db.execute_query(query)
-            for path, date_mod, size in rows:
-                self.known_files_cache[path] = (date_mod, size)
+            # Streamed, so only the dict (not a full result list beside it) is held in memory
+            for rows in self.db.execute_batches(query, batch_size=CACHE_LOAD_BATCH):
+                self.known_files_cache.update((path, (date_mod, size)) for path, date_mod, size in rows)
             print(f"Index loaded: {len(self.known_files_cache)} files known.")
         except sqlite3.Error:
             print("Cache load failed (likely empty DB).")
@@ -85,7 +182,6 @@ class FileScanner:
         Only uses a progress bar if the file is large.
         """
         file_path, file_size = args
-        hasher = hashlib.sha256()
         
         # Smart UI: Only grab a slot/bar if file is large
         use_bar = file_size >= UI_THRESHOLD_BYTES
@@ -101,21 +197,16 @@ class FileScanner:
                     unit='B', 
                     unit_scale=True, 
                     unit_divisor=1024, 
-                    desc=f"T{position}: {file_path.name[:15]}", 
+                    desc=f"T{position}: {os.path.basename(file_path)[:15]}", 
                     position=position, 
                     leave=False
                 ) as pbar:
-                    with open(file_path, 'rb') as f:
-                        while chunk := f.read(config.BLOCK_SIZE):
-                            hasher.update(chunk)
-                            pbar.update(len(chunk))
+                    with open(file_path, 'rb', buffering=0) as f:
+                        return _sha256_file(f, pbar)
             else:
                 # Fast path for small files (no UI overhead)
-                with open(file_path, 'rb') as f:
-                    while chunk := f.read(config.BLOCK_SIZE):
-                        hasher.update(chunk)
-                        
-            return hasher.hexdigest()
+                with open(file_path, 'rb', buffering=0) as f:
+                    return _sha256_file(f)
             
         except Exception as e:
             return None
@@ -123,16 +214,20 @@ class FileScanner:
             if position:
                 self.position_pool.put(position)
 
-    def _check_if_known_and_unchanged(self, file_path: Path, file_stat: os.stat_result) -> bool:
-        path_str = str(file_path)
-        if path_str not in self.known_files_cache:
+    def _check_if_known_and_unchanged(self, path_str: str, file_stat: os.stat_result) -> bool:
+        cached = self.known_files_cache.get(path_str)
+        if cached is None:
             return False
-        cached_date, cached_size = self.known_files_cache[path_str]
-        current_date = datetime.datetime.fromtimestamp(file_stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
-        return cached_size == file_stat.st_size and cached_date == current_date
+        cached_date, cached_size = cached
+        # Size is free to compare; only format the mtime when it could still match
+        if cached_size != file_stat.st_size:
+            return False
+        return cached_date == datetime.datetime.fromtimestamp(file_stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
 
     def scan_and_insert(self):
         print(f"\nStarting scan of directory: {self.source_dir}")
+        # Batches commit under WAL + synchronous=NORMAL, so they don't fsync the whole journal each time
+        self.db.enable_bulk_writes()
         self._load_cache()
         self.files_scanned_count = 0
         self.files_inserted_count = 0
@@ -145,26 +240,27 @@ class FileScanner:
         files_to_process = []
         
         # 1. Walk and Filter
-        for root, _, files in os.walk(self.source_dir):
-            root_path = Path(root)
-            for file_name in files:
-                full_path = root_path / file_name
-                
-                file_type_group = self._get_file_type_group(full_path)
-                if file_type_group == 'OTHER' and not full_path.suffix == '':
-                    continue 
-                
-                try:
-                    file_stat = full_path.stat()
-                except Exception:
-                    continue
-
-                self.files_scanned_count += 1
-                
-                if self._check_if_known_and_unchanged(full_path, file_stat):
-                    continue
-                
-                files_to_process.append((full_path, file_stat, file_type_group))
+        # Paths are built as strings; str(Path('.') / name) has no './' prefix, so neither do these
+        root_str = str(self.source_dir)
+        prefix = '' if root_str == '.' else os.path.join(root_str, '')
+        for path_str, entry in _iter_files(root_str, prefix):
+            ext = _suffix(entry.name)
+            file_type_group = self._get_file_type_group(ext)
+            if file_type_group == 'OTHER' and not ext == '':
+                continue 
+            
+            try:
+                # Follows symlinks like Path.stat(); cached on the entry
+                file_stat = entry.stat()
+            except OSError:
+                continue
+
+            self.files_scanned_count += 1
+            
+            if self._check_if_known_and_unchanged(path_str, file_stat):
+                continue
+            
+            files_to_process.append((path_str, file_stat, file_type_group))
 
         print(f"Files requiring hashing: {len(files_to_process)}")
         
@@ -180,14 +276,8 @@ class FileScanner:
         batch_fpi = [] # FilePathInstances buffer
 
         with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_file = {
-                executor.submit(self._calculate_sha256_worker, (f_path, f_stat.st_size)): (f_path, f_stat, f_group) 
-                for f_path, f_stat, f_group in files_to_process
-            }
-            
             with tqdm(total=len(files_to_process), desc="Total Progress", position=0) as pbar_main:
-                for future in concurrent.futures.as_completed(future_to_file):
-                    f_path, f_stat, f_group = future_to_file[future]
+                for future, (f_path, f_stat, f_group) in self._iter_completed(executor, files_to_process):
                     pbar_main.update(1)
                     
                     try:
@@ -199,40 +289,63 @@ class FileScanner:
                         continue
 
                     # 3. Buffer Results
-                    full_path_str = str(f_path)
-                    relative_path_str = str(f_path.relative_to(self.source_dir))
+                    full_path_str = f_path
+                    relative_path_str = f_path[len(prefix):]
                     date_modified_str = datetime.datetime.fromtimestamp(f_stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
                     
                     batch_mc.append((content_hash, f_stat.st_size, f_group, date_modified_str))
                     batch_fpi.append((content_hash, full_path_str, full_path_str, relative_path_str, date_modified_str, 0))
-                    self.files_inserted_count += 1
                     
                     # 4. Batch Insert
                     if len(batch_mc) >= DB_BATCH_SIZE:
-                        self._flush_batch(batch_mc, batch_fpi)
+                        self.files_inserted_count += self._flush_batch(batch_mc, batch_fpi)
                         batch_mc.clear()
                         batch_fpi.clear()
 
             # Final Flush
             if batch_mc:
-                self._flush_batch(batch_mc, batch_fpi)
+                self.files_inserted_count += self._flush_batch(batch_mc, batch_fpi)
 
         print(f"\nScan complete. Total files scanned: {self.files_scanned_count}, new recorded: {self.files_inserted_count}")
 
-    def _flush_batch(self, mc_data, fpi_data):
-        """Writes buffered data to DB."""
+    def _iter_completed(self, executor: concurrent.futures.Executor, files: List[Tuple[str, os.stat_result, str]]):
+        """
+        Hashes files on the executor, yielding (future, file) as each finishes.
+        At most max_workers * INFLIGHT_PER_WORKER jobs are queued; each completion submits the next file.
+        """
+        files_iter = iter(files)
+        pending = {}
+        
+        def submit(item):
+            f_path, f_stat, _ = item
+            pending[executor.submit(self._calculate_sha256_worker, (f_path, f_stat.st_size))] = item
+        
+        for item in itertools.islice(files_iter, self.max_workers * INFLIGHT_PER_WORKER):
+            submit(item)
+        
+        while pending:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                # Refill before handing the result back, so threads keep hashing during DB flushes
+                next_item = next(files_iter, None)
+                if next_item is not None:
+                    submit(next_item)
+                yield future, item
+
+    def _flush_batch(self, mc_data, fpi_data) -> int:
+        """
+        Writes buffered data to DB as a single transaction (one commit per batch).
+        Returns how many path instances were actually inserted (OR IGNORE skips known paths).
+        """
         try:
-            # Using execute_many which we added to DatabaseManager
-            self.db.execute_many(
-                "INSERT OR IGNORE INTO MediaContent (content_hash, size, file_type_group, date_best) VALUES (?, ?, ?, ?)", 
-                mc_data
-            )
-            self.db.execute_many(
-                "INSERT OR IGNORE INTO FilePathInstances (content_hash, path, original_full_path, original_relative_path, date_modified, is_primary) VALUES (?, ?, ?, ?, ?, ?)",
-                fpi_data
-            )
+            with self.db.transaction() as cursor:
+                cursor.executemany(INSERT_CONTENT_SQL, mc_data)
+                cursor.executemany(INSERT_INSTANCE_SQL, fpi_data)
+                return cursor.rowcount
         except sqlite3.Error as e:
             print(f"Batch Insert Error: {e}")
+            return 0
 
 if __name__ == "__main__":
     manager = ConfigManager()
@@ -4,7 +4,8 @@ _MAJOR_VERSION = 0
 _MINOR_VERSION = 1
 _REL_CHANGES = [30]
 _CHANGELOG_ENTRIES = [
-    "Released as v0.1.0"
+    "Released as v0.1.0",
+    "FIX: get_library_versions() recognises drop-in forks (Pillow-SIMD) that install under a different distribution name."
 ]
 _PATCH_VERSION = len(_CHANGELOG_ENTRIES)
 # Version: 0.11.31
@@ -88,6 +89,9 @@ except ImportError:
     EBOOK_AVAILABLE = False
 
 # --- Version Reporting ---
+# Faster drop-in builds that provide the same import package under another distribution name
+LIBRARY_ALTERNATIVES = {'Pillow': 'Pillow-SIMD'}
+
 def get_library_versions():
     """Returns a dictionary of relevant library versions for the project."""
     libs = ['tqdm', 'Pillow', 'pillow-heif', 'pymediainfo', 'rawpy', 'PyPDF2', 'python-docx', 'python-pptx', 'openpyxl', 'EbookLib', 'ImageHash']
@@ -97,6 +101,12 @@ def get_library_versions():
             versions[lib] = importlib.metadata.version(lib)
         except importlib.metadata.PackageNotFoundError:
             versions[lib] = "Not Installed"
+            alternative = LIBRARY_ALTERNATIVES.get(lib)
+            if alternative:
+                try:
+                    versions[lib] = f"{importlib.metadata.version(alternative)} ({alternative})"
+                except importlib.metadata.PackageNotFoundError:
+                    pass
     return versions
 
 # --- Helpers ---
@@ -4,7 +4,8 @@ _MAJOR_VERSION = 0
 _MINOR_VERSION = 1
 _REL_CHANGES = [21]
 _CHANGELOG_ENTRIES = [
-    "Released as v0.1.0"
+    "Released as v0.1.0",
+    "Added test_demo_libraries to the suite."
 ]
 _PATCH_VERSION = len(_CHANGELOG_ENTRIES)
 # Version: 0.4.21
@@ -28,7 +29,8 @@ TEST_MODULES = [
     "test_libraries",
     "test_assets",
     "test_migrator",
-    "test_type_coverage"
+    "test_type_coverage",
+    "test_demo_libraries"
 ]
 
 # List of files to check for the --get_versions functionality
@@ -59,7 +61,8 @@ VERSION_CHECK_FILES = [
     "test/test_libraries.py",
     "test/test_assets.py",
     "test/test_migrator.py",
-    "test/test_type_coverage.py"
+    "test/test_type_coverage.py",
+    "test/test_demo_libraries.py"
 ]
 
 # --- Helper for Dual Output (Console + File) ---
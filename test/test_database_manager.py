@@ -7,7 +7,12 @@ _MINOR_VERSION = 1
 # CHANGELOG:
 _REL_CHANGES = [8]
 _CHANGELOG_ENTRIES = [
-    "Released as v0.1.0"
+    "Released as v0.1.0",
+    "Added coverage for batched SELECT streaming.",
+    "Added coverage for transaction() rollback.",
+    "Added coverage for the enable_bulk_writes() pragmas.",
+    "Added coverage for transaction() rollback on non-sqlite exceptions.",
+    "Added coverage for create_schema dropping superseded indices."
 ]
 # ------------------------------------------------------------------------------
 import unittest
@@ -20,6 +25,7 @@ import sys
 # Runtime imports
 # PATH SETUP
 sys.path.append(str(Path(__file__).resolve().parent.parent))
+import database_manager
 from database_manager import DatabaseManager
 from version_util import print_version_info
 
@@ -123,6 +129,72 @@ class TestDatabaseManager(unittest.TestCase):
             
         self.assertTrue(db_path.exists(), "DB file was not created for test 04 setup.")
 
+    def test_05_execute_batches_streams_all_rows(self):
+        """Test that execute_batches yields every row in bounded batches."""
+        with DatabaseManager(self.db_path) as db:
+            db.execute_many(
+                "INSERT INTO MediaContent (content_hash, size, file_type_group) VALUES (?, ?, ?);",
+                [(f"HASH_{i:03d}", i, 'IMAGE') for i in range(25)]
+            )
+            batches = list(db.execute_batches("SELECT content_hash FROM MediaContent ORDER BY content_hash;", batch_size=10))
+            
+            self.assertEqual([len(b) for b in batches], [10, 10, 5])
+            self.assertEqual(batches[2][-1][0], "HASH_024")
+
+    def test_06_transaction_rolls_back_as_a_unit(self):
+        """Test that a failing statement undoes the earlier statements of the same transaction."""
+        with DatabaseManager(self.db_path) as db:
+            with self.assertRaises(sqlite3.IntegrityError):
+                with db.transaction() as cursor:
+                    cursor.execute("INSERT INTO MediaContent (content_hash, size, file_type_group) VALUES ('TX_HASH', 1, 'IMAGE');")
+                    cursor.execute("INSERT INTO MediaContent (content_hash, size, file_type_group) VALUES ('TX_HASH', 1, 'IMAGE');")
+            
+            count = db.execute_query("SELECT COUNT(*) FROM MediaContent WHERE content_hash = 'TX_HASH';")[0][0]
+            self.assertEqual(count, 0, "Transaction was not rolled back.")
+
+    def test_07_enable_bulk_writes_pragmas(self):
+        """Test that enable_bulk_writes switches the connection to WAL with the bulk settings."""
+        with DatabaseManager(self.db_path) as db:
+            db.enable_bulk_writes()
+            
+            self.assertEqual(db.conn.execute("PRAGMA journal_mode;").fetchone()[0], 'wal')
+            self.assertEqual(db.conn.execute("PRAGMA synchronous;").fetchone()[0], 1) # NORMAL
+            self.assertEqual(db.conn.execute("PRAGMA wal_autocheckpoint;").fetchone()[0], database_manager.BULK_WAL_AUTOCHECKPOINT)
+
+    def test_08_transaction_rolls_back_on_non_sqlite_error(self):
+        """Test that an exception from a parameter generator rolls back the whole block and closes the transaction."""
+        def rows():
+            yield ('GEN_HASH_1', 1, 'IMAGE')
+            raise ValueError("generator failed")
+        
+        with DatabaseManager(self.db_path) as db:
+            with self.assertRaises(ValueError):
+                with db.transaction() as cursor:
+                    cursor.execute("INSERT INTO MediaContent (content_hash, size, file_type_group) VALUES ('TX_HASH', 1, 'IMAGE');")
+                    cursor.executemany("INSERT INTO MediaContent (content_hash, size, file_type_group) VALUES (?, ?, ?);", rows())
+            
+            self.assertFalse(db.conn.in_transaction, "Transaction was left open.")
+            # A later write commits; it must not carry the failed block's rows with it
+            db.execute_query("INSERT INTO MediaContent (content_hash, size, file_type_group) VALUES ('AFTER_HASH', 1, 'IMAGE');")
+        
+        with DatabaseManager(self.db_path) as db:
+            hashes = [row[0] for row in db.execute_query("SELECT content_hash FROM MediaContent ORDER BY content_hash;")]
+            self.assertEqual(hashes, ['AFTER_HASH'], "Failed transaction was committed.")
+
+    def test_09_create_schema_drops_obsolete_indexes(self):
+        """Test that re-running create_schema on an older database replaces the superseded indices."""
+        with DatabaseManager(self.db_path) as db:
+            # Indices an earlier schema version created
+            db.conn.execute("CREATE INDEX IF NOT EXISTS idx_fpi_content_hash ON FilePathInstances(content_hash);")
+            db.conn.execute("CREATE INDEX IF NOT EXISTS idx_mc_hash_size ON MediaContent(content_hash, size);")
+            db.conn.execute("CREATE INDEX IF NOT EXISTS idx_mc_hash_date_best ON MediaContent(content_hash, date_best);")
+            db.create_schema()
+            
+            indexes = {row[0] for row in db.execute_query("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%';")}
+            self.assertTrue(indexes.isdisjoint(database_manager.OBSOLETE_INDEXES))
+            self.assertIn('idx_mc_hash_size_date', indexes)
+            self.assertIn('idx_fpi_primary_order', indexes)
+
 
 # --- CLI EXECUTION LOGIC ---
 if __name__ == '__main__':
@@ -4,7 +4,11 @@ _MAJOR_VERSION = 0
 _MINOR_VERSION = 1
 _REL_CHANGES = [8]
 _CHANGELOG_ENTRIES = [
-    "Released as v0.1.0"
+    "Released as v0.1.0",
+    "Added coverage for the process-parallel path calculation.",
+    "Added coverage for the KEEP_NEWEST deduplication strategy.",
+    "Replaced the pool-vs-serial path check with batch-vs-single now that path calculation is serial only.",
+    "Added coverage for year/month slicing matching strptime on 'T' times, invalid days and unpadded dates."
 ]
 # ------------------------------------------------------------------------------
 import unittest
@@ -20,6 +24,7 @@ from unittest.mock import patch
 try:
     sys.path.insert(0, str(Path(__file__).parent.parent)) 
     from database_manager import DatabaseManager
+    import deduplicator
     from deduplicator import Deduplicator
     from config_manager import ConfigManager
     from version_util import print_version_info
@@ -110,6 +115,9 @@ class TestDeduplicator(unittest.TestCase):
         """Test full run updates DB correctly."""
         self.deduplicator.run_deduplication()
         
+        self.assertEqual(self.deduplicator.processed_count, 1)
+        self.assertEqual(self.deduplicator.duplicates_found, 1)
+        
         with DatabaseManager(self.db_manager_path) as db:
             # Check is_primary was set. 
             prim_row = db.execute_query("SELECT file_id FROM FilePathInstances WHERE path LIKE '%A.jpg'")[0]
@@ -123,6 +131,45 @@ class TestDeduplicator(unittest.TestCase):
             # Verify path contains the date structure
             self.assertIn(os.path.join("2020", "01"), final_path)
 
+    def test_04_batch_paths_match_single_path(self):
+        """Test the batch path calculation yields the same renamed paths as one-at-a-time calls."""
+        rows = [
+            (f"{i:02d}{TEST_HASH[2:]}", i, str(self.test_dir / f"IMG_{i}.jpg"), "2020-01-01 10:00:00", "2021-02-02 10:00:00")
+            for i in range(1, 6)
+        ]
+        with patch.object(ConfigManager, 'ORGANIZATION_PREFS', {'rename_on_copy': True}):
+            batch = list(self.deduplicator._calculate_final_paths(rows))
+            single = [
+                (self.deduplicator._calculate_final_path(path, content_hash, ".jpg", file_id, date_best, date_fs), content_hash)
+                for content_hash, file_id, path, date_best, date_fs in rows
+            ]
+        
+        self.assertEqual(batch, single)
+        self.assertIn(os.path.join("2020", "01", f"01{TEST_HASH[2:12]}_1.jpg"), batch[0][0])
+
+    def test_05_keep_newest_strategy(self):
+        """Test KEEP_NEWEST selects the most recently modified instance as primary."""
+        with patch.object(ConfigManager, 'ORGANIZATION_PREFS', {'rename_on_copy': False, 'deduplication_strategy': 'KEEP_NEWEST'}):
+            newest = Deduplicator(self.db_manager, self.config_manager)
+            newest.run_deduplication()
+        
+        primaries = self.db_manager.execute_query("SELECT path FROM FilePathInstances WHERE is_primary = 1;")
+        self.assertEqual(len(primaries), 1)
+        self.assertTrue(primaries[0][0].endswith('B.jpg'))
+
+    def test_06_year_month_matches_strptime_rules(self):
+        """Test date slicing accepts and rejects exactly what strptime('%Y-%m-%d') on the first word did."""
+        resolve = deduplicator._resolve_year_month
+        fs_date = "2019-07-01 08:00:00"
+        
+        self.assertEqual(resolve("2020-01-05 10:00:00", fs_date), ("2020", "01"))
+        self.assertEqual(resolve("2020-02-29", fs_date), ("2020", "02"))
+        # Unpadded month/day parsed fine under strptime and must still be filed by metadata date
+        self.assertEqual(resolve("2020-1-5 10:00", fs_date), ("2020", "01"))
+        # Not a date strptime accepted: fall back to the file system date
+        for bad in ("2020-01-05T10:00:00+0100", "2020-02-30", "2019-02-29", "2020-13-01", "2020-01-+5", "", None):
+            self.assertEqual(resolve(bad, fs_date), ("2019", "07"), bad)
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('-v', '--version', action='store_true')
@@ -0,0 +1,244 @@
+# ==============================================================================
+# File: test/test_demo_libraries.py
+_MAJOR_VERSION = 0
+_MINOR_VERSION = 1
+_REL_CHANGES = [1]
+_CHANGELOG_ENTRIES = [
+    "Released as v0.1.0",
+    "Added coverage for resumable re-scans: unchanged files are skipped, changed ones re-hashed and re-pointed.",
+    "Added coverage for a batch write failure only losing the offending file.",
+    "Added coverage for the imagesize fast path falling back to Image.open on mismatched, MPF, or failed probes."
+]
+_PATCH_VERSION = len(_CHANGELOG_ENTRIES)
+# ------------------------------------------------------------------------------
+import unittest
+from pathlib import Path
+import os
+import shutil
+import argparse
+import sys
+import hashlib
+import io
+import types
+import warnings
+from unittest.mock import patch
+from PIL import Image
+
+# Add project root to sys.path
+try:
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    import demo_libraries
+    from database_manager import DatabaseManager
+    from version_util import print_version_info
+except ImportError as e:
+    print(f"Test setup import error: {e}")
+    demo_libraries = None
+
+TEST_OUTPUT_DIR_NAME = "test_output_demo"
+
+class TestDemoAssetWalk(unittest.TestCase):
+
+    def setUp(self):
+        if not demo_libraries: self.skipTest("Dep fail")
+        self.test_dir = Path(os.getcwd()) / TEST_OUTPUT_DIR_NAME / 'walk'
+        if self.test_dir.exists(): shutil.rmtree(self.test_dir)
+        (self.test_dir / 'sub').mkdir(parents=True)
+        (self.test_dir / 'top.png').write_bytes(b'top')
+        (self.test_dir / 'sub' / 'inner.jpg').write_bytes(b'inner')
+        (self.test_dir / 'sub' / 'README').write_bytes(b'no extension')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir.parent, ignore_errors=True)
+
+    def _walk(self):
+        return sorted(rel_path for _, rel_path, _ in demo_libraries.iter_asset_files(self.test_dir))
+
+    def test_01_yields_files_with_extensions(self):
+        """Test the walk finds nested files by relative path and ignores extensionless ones."""
+        self.assertEqual(self._walk(), ['sub/inner.jpg'.replace('/', os.sep), 'top.png'])
+
+    def test_02_symlinked_directory_is_not_followed(self):
+        """Test a symlink back to a parent directory does not make the walk loop."""
+        try:
+            os.symlink('..', self.test_dir / 'sub' / 'loop', target_is_directory=True)
+        except (OSError, NotImplementedError):
+            self.skipTest("Symlinks not supported here")
+
+        self.assertEqual(self._walk(), ['sub/inner.jpg'.replace('/', os.sep), 'top.png'])
+
+    def test_03_unreadable_directory_is_skipped(self):
+        """Test a directory that can't be listed is skipped instead of aborting the walk."""
+        real_scandir = os.scandir
+        def scandir(path):
+            if os.path.basename(path) == 'sub':
+                raise PermissionError(13, "Permission denied", path)
+            return real_scandir(path)
+
+        with patch.object(demo_libraries.os, 'scandir', scandir):
+            self.assertEqual(self._walk(), ['top.png'])
+
+class TestDemoImageProbe(unittest.TestCase):
+
+    def setUp(self):
+        if not demo_libraries: self.skipTest("Dep fail")
+        self.test_dir = Path(os.getcwd()) / TEST_OUTPUT_DIR_NAME / 'probe'
+        if self.test_dir.exists(): shutil.rmtree(self.test_dir)
+        self.test_dir.mkdir(parents=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir.parent, ignore_errors=True)
+
+    def _save(self, name, fmt, size=(30, 20)):
+        path = self.test_dir / name
+        Image.new('RGB', size).save(path, fmt)
+        return path
+
+    def _extract(self, path, probe):
+        """Runs _extract_image with a fake imagesize whose get() is probe; returns (meta, probe calls)."""
+        calls = []
+        def get(f, **kwargs):
+            calls.append(f)
+            return probe(f)
+        fake = types.SimpleNamespace(get=get)
+        with patch.object(demo_libraries, 'IMAGESIZE_AVAILABLE', True), \
+             patch.object(demo_libraries, 'IMAGESIZE_KWARGS', {}, create=True), \
+             patch.object(demo_libraries, 'imagesize', fake, create=True):
+            asset = demo_libraries._extract_image(path, {})
+        return asset.extended_metadata, calls
+
+    def test_01_matching_signature_uses_imagesize(self):
+        """Test a plain JPEG/PNG takes the probe's size and Pillow's format name."""
+        for name, fmt in (('a.jpg', 'JPEG'), ('b.png', 'PNG')):
+            meta, calls = self._extract(self._save(name, fmt), lambda f: (7, 9))
+            self.assertEqual(len(calls), 1)
+            self.assertEqual((meta['Width'], meta['Height'], meta['Format']), (7, 9, fmt))
+
+    def test_02_png_saved_as_jpg_falls_back(self):
+        """Test a PNG with a .jpg extension is reported as PNG by Image.open, not probed as JPEG."""
+        meta, calls = self._extract(self._save('fake.jpg', 'PNG'), lambda f: (7, 9))
+        self.assertEqual(calls, [])
+        self.assertEqual((meta['Width'], meta['Height'], meta['Format']), (30, 20, 'PNG'))
+
+    def test_03_mpf_jpeg_falls_back(self):
+        """Test a JPEG carrying an APP2 MPF segment is left to Image.open."""
+        plain = self._save('plain.jpg', 'JPEG').read_bytes()
+        payload = b'MPF\x00' + b'\x00' * 16
+        app2 = b'\xff\xe2' + (len(payload) + 2).to_bytes(2, 'big') + payload
+        path = self.test_dir / 'multi.jpg'
+        path.write_bytes(plain[:2] + app2 + plain[2:])
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # Pillow flags the stub MP index as malformed
+            meta, calls = self._extract(path, lambda f: (7, 9))
+        self.assertEqual(calls, [])
+        self.assertEqual((meta['Width'], meta['Height']), (30, 20))
+        self.assertIn(meta['Format'], ('JPEG', 'MPO'))
+
+    def test_04_failed_probe_falls_back(self):
+        """Test a (-1, -1) result or an exception from imagesize is a miss, not an error."""
+        def boom(f):
+            raise ValueError("bad header")
+        path = self._save('c.png', 'PNG')
+        for probe in (lambda f: (-1, -1), boom):
+            meta, calls = self._extract(path, probe)
+            self.assertEqual(len(calls), 1)
+            self.assertEqual((meta['Width'], meta['Height'], meta['Format']), (30, 20, 'PNG'))
+
+class TestDemoRescan(unittest.TestCase):
+
+    def setUp(self):
+        if not demo_libraries: self.skipTest("Dep fail")
+        self.test_dir = Path(os.getcwd()) / TEST_OUTPUT_DIR_NAME / 'rescan'
+        if self.test_dir.exists(): shutil.rmtree(self.test_dir)
+        self.assets_dir = self.test_dir / 'assets'
+        (self.assets_dir / 'sub').mkdir(parents=True)
+        self.files = {
+            'a.txt': b'alpha',
+            'b.txt': b'bravo',
+            os.path.join('sub', 'c.txt'): b'charlie',
+        }
+        for rel_path, content in self.files.items():
+            (self.assets_dir / rel_path).write_bytes(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir.parent, ignore_errors=True)
+
+    def _run_demo(self):
+        """Runs one inline demo scan and returns the relative paths that were hashed."""
+        output_dir = self.test_dir / 'demo'
+        hash_spy = patch.object(demo_libraries, 'calculate_file_hash_with_progress',
+                                wraps=demo_libraries.calculate_file_hash_with_progress)
+        with patch.object(demo_libraries, 'TEST_ASSETS_DIR', self.assets_dir), \
+             patch.object(demo_libraries, 'DEMO_OUTPUT_DIR', output_dir), \
+             patch.object(demo_libraries, 'DEMO_DB_PATH', output_dir / 'metadata.sqlite'), \
+             patch.object(sys, 'argv', ['demo_libraries.py', '--workers', '1']), \
+             hash_spy as spy:
+            demo_libraries.run_demo()
+        return sorted(os.path.relpath(call.args[0], self.assets_dir) for call in spy.call_args_list)
+
+    def _path_hashes(self):
+        with DatabaseManager(str(self.test_dir / 'demo' / 'metadata.sqlite')) as db:
+            return dict(db.execute_query("SELECT original_relative_path, content_hash FROM FilePathInstances;"))
+
+    def test_01_rescan_rehashes_only_changed_file(self):
+        """Test a re-scan skips unchanged files and re-points a changed file's path at its new hash."""
+        self.assertEqual(self._run_demo(), sorted(self.files))
+        self.assertEqual(self._path_hashes(), {p: hashlib.md5(c).hexdigest() for p, c in self.files.items()})
+
+        # Nothing changed: every file is fast-skipped on (path, size, mtime) without being opened
+        self.assertEqual(self._run_demo(), [])
+
+        # New content of the same size, with an mtime that is certainly different
+        changed = self.assets_dir / 'a.txt'
+        stat = changed.stat()
+        changed.write_bytes(b'ALPHA')
+        os.utime(changed, (stat.st_atime, stat.st_mtime + 10))
+
+        self.assertEqual(self._run_demo(), ['a.txt'])
+        path_hashes = self._path_hashes()
+        self.assertEqual(len(path_hashes), 3)
+        self.assertEqual(path_hashes['a.txt'], hashlib.md5(b'ALPHA').hexdigest())
+        self.assertEqual(path_hashes['b.txt'], hashlib.md5(b'bravo').hexdigest())
+
+        # The refreshed row carries the new mtime, so the next scan skips it again
+        self.assertEqual(self._run_demo(), [])
+
+    def test_02_unwritable_row_only_loses_that_file(self):
+        """Test a value SQLite can't bind fails its own file while the rest of the batch is persisted."""
+        real_scan_file = demo_libraries.scan_file
+        def scan_file(job, pbar_inner=None):
+            rel_path, scanned, error = real_scan_file(job, pbar_inner)
+            if rel_path == 'b.txt':
+                content_hash, media_group, content_columns, meta_json = scanned
+                # A dict is not a bindable SQLite parameter
+                scanned = (content_hash, media_group, content_columns[:4] + ({'bad': 'bitrate'},) + content_columns[5:], meta_json)
+            return rel_path, scanned, error
+
+        with patch.object(demo_libraries, 'scan_file', scan_file):
+            self.assertEqual(self._run_demo(), sorted(self.files))
+
+        path_hashes = self._path_hashes()
+        self.assertEqual(sorted(path_hashes), ['a.txt', os.path.join('sub', 'c.txt')])
+
+        # The failed file was never recorded, so the next run picks it up again
+        self.assertEqual(self._run_demo(), ['b.txt'])
+        self.assertEqual(self._path_hashes()['b.txt'], hashlib.md5(b'bravo').hexdigest())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-v', '--version', action='store_true')
+    parser.add_argument('--changes', nargs='?', const='all', help='Show changelog history.')
+    args, unknown = parser.parse_known_args()
+
+    if hasattr(args, 'changes') and args.changes:
+        from version_util import print_change_history
+        print_change_history(__file__, args.changes)
+        sys.exit(0)
+    if args.version:
+        try:
+            print_version_info(__file__, "Demo Libraries Tests")
+        except Exception:
+            print(f"Version: {_MAJOR_VERSION}.{_MINOR_VERSION}.{len(_CHANGELOG_ENTRIES)}")
+        sys.exit(0)
+
+    unittest.main(argv=[sys.argv[0]] + unknown, exit=False)